@@ -0,0 +1,23 @@
+import os
+
+# ======================================
+# CONFIGURAÇÃO DO GUNICORN
+# ======================================
+# Uso: gunicorn -c gunicorn_conf.py main:app
+
+bind = f"0.0.0.0:{os.getenv('PORT', 10000)}"
+
+# Worker assíncrono do aiohttp: cada processo atende centenas de webhooks
+# simultâneos, então basta um processo por CPU
+worker_class = "aiohttp.GunicornWebWorker"
+workers = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+
+# Keep-alive acima do timeout dos balanceadores (Render usa 60s)
+keepalive = 75
+
+# Maior que REQUEST_TIMEOUT (15s) + margem para o envio ao Telegram
+timeout = 35
+
+# No desligamento: webhooks em andamento (até REQUEST_TIMEOUT) e depois a
+# fila de envios (até TELEGRAM_API_TIMEOUT) precisam caber aqui
+graceful_timeout = 30
@@ -2,28 +2,49 @@ import os
 import sys
 import time
 import random
-import requests
+import hashlib
+import asyncio
+import orjson
+import aiohttp
+import atexit
 import logging
-import traceback
-from flask import Flask, request, jsonify
-from typing import Dict, Any, Optional
+import logging.handlers
+import redis.asyncio as redis
+from aiohttp import web
+from queue import Queue
+from datetime import datetime, timezone
+from cachetools import TTLCache
+from threading import Lock
+from typing import Callable, Dict, Any, Optional
 
 # ======================================
 # CONFIGURAÇÃO INICIAL
 # ======================================
-app = Flask(__name__)
-
-# Configuração de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+app = web.Application()
+
+# Configuração de logging (I/O de log fora do event loop via QueueListener)
+_log_q: Queue = Queue(-1)
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+_log_listener = logging.handlers.QueueListener(_log_q, _log_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+logging.root.addHandler(logging.handlers.QueueHandler(_log_q))
+logging.root.setLevel(logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Constantes
 MAX_RETRIES = 3
+RETRY_BACKOFF = 0.2
+RETRY_MAX_DELAY = 5
+RETRY_AFTER_MAX = 60
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
 REQUEST_TIMEOUT = 15
 TELEGRAM_API_TIMEOUT = 10
+SEND_QUEUE_SIZE = 10000
+SEND_WORKERS = 4
+MAX_PROMPT_LENGTH = 1000
+BATCH_WINDOW = float(os.getenv("BATCH_WINDOW_MS", "50")) / 1000
 
 # ======================================
 # VERIFICAÇÕES DE AMBIENTE
@@ -44,8 +65,10 @@ def check_environment() -> None:
 
     # Verifica dependências Python
     required_packages = {
-        'flask': 'Flask',
-        'requests': 'Requests',
+        'aiohttp': 'aiohttp',
+        'orjson': 'orjson',
+        'cachetools': 'cachetools',
+        'redis': 'redis',
         'gunicorn': 'Gunicorn'
     }
     
@@ -66,7 +89,7 @@ def check_environment() -> None:
 try:
     check_environment()
 except Exception as e:
-    logger.critical(f"Falha na inicialização: {str(e)}")
+    logger.critical("Falha na inicialização: %s", e)
     sys.exit(1)
 
 # ======================================
@@ -76,6 +99,57 @@ TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 PORT = int(os.getenv("PORT", 10000))
 TELEGRAM_API_URL = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
+TELEGRAM_GETME_URL = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/getMe"
+TELEGRAM_ACTION_URL = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendChatAction"
+OPENROUTER_CHAT_URL = "https://openrouter.ai/api/v1/chat/completions"
+OPENROUTER_HEALTH_URL = "https://openrouter.ai/api/v1"
+
+# Cabeçalhos e timeouts fixos das chamadas externas
+TELEGRAM_HEADERS = {"Content-Type": "application/json"}
+OPENROUTER_HEADERS = {
+    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+    "HTTP-Referer": "https://melissa-bot.com",
+    "X-Title": "MelissaBot",
+    "Content-Type": "application/json"
+}
+TELEGRAM_TIMEOUT = aiohttp.ClientTimeout(total=TELEGRAM_API_TIMEOUT)
+OPENROUTER_TIMEOUT = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+TELEGRAM_ACTION_TIMEOUT = aiohttp.ClientTimeout(total=3)
+HEALTH_TIMEOUT = aiohttp.ClientTimeout(total=3)
+
+# Sessão HTTP compartilhada (criada no startup, dentro do event loop)
+aio_session: Optional[aiohttp.ClientSession] = None
+
+# Fila de envios para o Telegram (drenada por workers em background)
+_send_q: Optional[asyncio.Queue] = None
+_send_workers: list = []
+
+# Prompts aguardando a janela de agrupamento das chamadas ao OpenRouter
+_pending: list = []
+_background_tasks: set = set()
+
+# Cache de respostas para prompts repetidos: Redis (compartilhado entre
+# workers) quando REDIS_URL estiver definido, senão LRU + TTL em memória
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "1") == "1"
+CACHE_TTL = 3600
+CACHE_KEY_PREFIX = "postigo:resp:"
+REDIS_URL = os.getenv("REDIS_URL")
+_rds: Optional[redis.Redis] = (
+    redis.Redis.from_url(REDIS_URL, socket_timeout=0.2, decode_responses=True)
+    if REDIS_URL else None
+)
+_resp_cache: TTLCache = TTLCache(maxsize=2048, ttl=CACHE_TTL)
+_cache_lock = Lock()
+
+# Cache semântico (opcional: requer sentence-transformers e numpy)
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "0") == "1"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_MAX_ENTRIES = 5000
+_sem_model = None
+_sem_matrix = None  # np.ndarray (N, 384) float32 com embeddings normalizados
+_sem_last_used = None  # np.ndarray (N,) com o último uso de cada entrada
+_sem_responses: list = []
+_sem_lock = Lock()
 
 # Personalidade da Postigo
 SYSTEM_PROMPT ="""
@@ -114,149 +188,412 @@ Você é **Postigo**, líder evangélico. Seu devocional "Acessando as Promessas
    Usuário: "Estou sem esperança"  
    Postigo: "Deus te alcança AGORA! Salmo 34:18. Quer um guia prático? 😇"  
 """  
+
+# Payload do OpenRouter pré-serializado; só o texto do usuário muda por chamada
+_PAYLOAD_HEAD, _PAYLOAD_TAIL = orjson.dumps({
+    "model": "anthropic/claude-3-haiku",
+    "messages": [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": "__U__"}
+    ],
+    "temperature": 0.8,
+    "max_tokens": 150,
+    "stream": True
+}).split(b'"__U__"')
+
+# Respostas fixas para mensagens triviais (não gastam chamada ao OpenRouter)
+_TRIVIAL_REPLIES: Dict[str, str] = {
+    "oi": "Oi, irmão(ã)! Que bom te ver por aqui. Como posso orar por você? 🙏",
+    "olá": "Olá, irmão(ã)! Que bom te ver por aqui. Como posso orar por você? 🙏",
+    "ola": "Olá, irmão(ã)! Que bom te ver por aqui. Como posso orar por você? 🙏",
+    "paz": "A paz do Senhor! O que seu coração está buscando hoje? 😇",
+    "amém": "Amém! Deus é fiel. ✨",
+    "amem": "Amém! Deus é fiel. ✨",
+    "ok": "Combinado! Estou aqui quando precisar. 🙏",
+    "👍": "Deus abençoe! Estou aqui quando precisar. 🙏",
+    "obrigado": "Toda glória a Deus! 🙏",
+    "obrigada": "Toda glória a Deus! 🙏"
+}
+LONG_PROMPT_REPLY = "Essa mensagem ficou grande demais pra mim... resume em poucas palavras? 😅"
+
+# Respostas de fallback quando o OpenRouter falha
+_FALLBACKS = (
+    "Tá meio lenta a internet aqui hoje... 😅",
+    "A conexão falhou... bora tentar outra vez? 😏",
+    "Não entendi direito... repete aí irmão(ã)! 😏"
+)
+
 # ======================================
 # FUNÇÕES PRINCIPAIS
 # ======================================
-def send_telegram_message(chat_id: int, text: str) -> bool:
+def _cache_key(prompt: str) -> str:
+    """Chave do cache: modelo + prompt de sistema + prompt normalizado"""
+    normalized = prompt.strip().casefold()
+    raw = "anthropic/claude-3-haiku" + "\x1f" + SYSTEM_PROMPT + "\x1f" + normalized
+    return CACHE_KEY_PREFIX + hashlib.sha256(raw.encode()).hexdigest()
+
+async def _cache_get(key: str) -> Optional[str]:
+    """Busca resposta no cache (Redis fora do ar conta como miss)"""
+    if _rds is not None:
+        try:
+            return await _rds.get(key)
+        except redis.RedisError as e:
+            logger.warning("Redis indisponível (get): %s", e)
+            return None
+    with _cache_lock:
+        return _resp_cache.get(key)
+
+async def _cache_set(key: str, content: str) -> None:
+    """Guarda resposta no cache com TTL"""
+    if _rds is not None:
+        try:
+            await _rds.setex(key, CACHE_TTL, content)
+        except redis.RedisError as e:
+            logger.warning("Redis indisponível (set): %s", e)
+        return
+    with _cache_lock:
+        _resp_cache[key] = content
+
+def _semantic_encode(prompt: str):
+    """Gera o embedding normalizado do prompt (carrega o modelo sob demanda)"""
+    global _sem_model, SEMANTIC_CACHE_ENABLED
+    with _sem_lock:
+        # Outra thread pode ter desativado o cache enquanto esperava o lock
+        if not SEMANTIC_CACHE_ENABLED:
+            return None
+        if _sem_model is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError:
+                logger.error("sentence-transformers não instalado; cache semântico desativado")
+                SEMANTIC_CACHE_ENABLED = False
+                return None
+            try:
+                _sem_model = SentenceTransformer("all-MiniLM-L6-v2")
+            except Exception:
+                logger.exception("Falha ao carregar o modelo de embeddings; cache semântico desativado")
+                SEMANTIC_CACHE_ENABLED = False
+                return None
+    return _sem_model.encode([prompt.strip()], normalize_embeddings=True)[0].astype("float32")
+
+def _semantic_lookup(embedding) -> Optional[str]:
+    """Retorna a resposta do prompt mais parecido se passar do limiar"""
+    with _sem_lock:
+        if _sem_matrix is None:
+            return None
+        sims = _sem_matrix @ embedding
+        idx = int(sims.argmax())
+        if sims[idx] < SEMANTIC_CACHE_THRESHOLD:
+            return None
+        _sem_last_used[idx] = time.monotonic()
+        return _sem_responses[idx]
+
+def _semantic_store(embedding, content: str) -> None:
+    """Guarda o embedding e a resposta, despejando a entrada menos usada"""
+    global _sem_matrix, _sem_last_used
+    import numpy as np
+
+    now = time.monotonic()
+    with _sem_lock:
+        if _sem_matrix is None:
+            _sem_matrix = embedding[np.newaxis, :]
+            _sem_last_used = np.array([now])
+            _sem_responses.append(content)
+        elif len(_sem_responses) >= SEMANTIC_CACHE_MAX_ENTRIES:
+            idx = int(_sem_last_used.argmin())
+            _sem_matrix[idx] = embedding
+            _sem_last_used[idx] = now
+            _sem_responses[idx] = content
+        else:
+            _sem_matrix = np.vstack([_sem_matrix, embedding])
+            _sem_last_used = np.append(_sem_last_used, now)
+            _sem_responses.append(content)
+
+def _backoff_delay(attempt: int) -> float:
+    """Espera exponencial com jitter (0.2s, 0.4s, 0.8s...) limitada a RETRY_MAX_DELAY"""
+    return min(RETRY_BACKOFF * 2 ** attempt + random.uniform(0, 0.2), RETRY_MAX_DELAY)
+
+def _retry_after(raw: bytes, header: Optional[str]) -> Optional[float]:
+    """Espera pedida pelo Telegram: parameters.retry_after do corpo ou cabeçalho Retry-After"""
+    try:
+        value = orjson.loads(raw).get("parameters", {}).get("retry_after")
+    except (ValueError, AttributeError):
+        value = None
+    if value is None and header and header.isdigit():
+        value = header
+    return float(value) if value is not None else None
+
+async def send_telegram_message(chat_id: int, text: str) -> bool:
     """Envia mensagem com retry automático e tratamento robusto"""
     for attempt in range(MAX_RETRIES):
+        retry_after = None
         try:
-            response = requests.post(
+            async with aio_session.post(
                 TELEGRAM_API_URL,
-                json={
+                data=orjson.dumps({
                     "chat_id": chat_id,
                     "text": text,
                     "parse_mode": "Markdown"
-                },
-                timeout=TELEGRAM_API_TIMEOUT
-            )
-            
-            if response.status_code == 200:
-                return True
-                
-            logger.error(f"Telegram API error (attempt {attempt+1}): {response.text}")
-            time.sleep(1)
-            
+                }),
+                headers=TELEGRAM_HEADERS,
+                timeout=TELEGRAM_TIMEOUT
+            ) as response:
+                if response.status == 200:
+                    return True
+
+                raw = await response.read()
+                logger.error("Telegram API error (attempt %d): %s", attempt + 1, raw.decode(errors="replace"))
+
+                # Erros do cliente (ex.: Markdown inválido) não melhoram com retry
+                if response.status not in RETRY_STATUSES:
+                    return False
+                retry_after = _retry_after(raw, response.headers.get("Retry-After"))
+
         except Exception as e:
-            logger.error(f"Erro ao enviar mensagem (attempt {attempt+1}): {str(e)}")
-            time.sleep(2)
+            logger.error("Erro ao enviar mensagem (attempt %d): %s", attempt + 1, e)
+
+        if attempt + 1 < MAX_RETRIES:
+            if retry_after is None:
+                await asyncio.sleep(_backoff_delay(attempt))
+            elif retry_after <= RETRY_AFTER_MAX:
+                # Flood control: tentar antes do prazo só gera outro 429
+                await asyncio.sleep(retry_after)
+            else:
+                logger.error("Telegram pediu %.0fs de espera; desistindo do envio", retry_after)
+                return False
     
     logger.error("Falha ao enviar mensagem após todas as tentativas")
     return False
 
-def generate_response(prompt: str) -> str:
+def _spawn(coro) -> None:
+    """Dispara uma tarefa em background mantendo referência até terminar"""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+async def send_typing(chat_id: int) -> None:
+    """Mostra "digitando..." no chat enquanto a resposta é gerada"""
+    try:
+        async with aio_session.post(
+            TELEGRAM_ACTION_URL,
+            data=orjson.dumps({"chat_id": chat_id, "action": "typing"}),
+            headers=TELEGRAM_HEADERS,
+            timeout=TELEGRAM_ACTION_TIMEOUT
+        ) as response:
+            if response.status != 200:
+                logger.warning("sendChatAction falhou (%d)", response.status)
+    except Exception as e:
+        logger.warning("sendChatAction falhou: %s", e)
+
+async def generate_response(prompt: str, chat_id: Optional[int] = None) -> str:
     """Gera resposta com fallback robusto e tratamento completo"""
-    # Fallback responses (usando random importado corretamente)
-    fallback_responses = [
-        "Tá meio lenta a internet aqui hoje... 😅",
-        "A conexão falhou... bora tentar outra vez? 😏",
-        "Não entendi direito... repete aí irmão(ã)! 😏"
-    ]
-    
     # Verifica credenciais
     if not OPENROUTER_API_KEY:
         logger.error("OPENROUTER_API_KEY não configurada")
-        return random.choice(fallback_responses)
-
+        return _FALLBACKS[random.randrange(len(_FALLBACKS))]
+
+    # Consulta o cache antes de chamar a API
+    key = _cache_key(prompt)
+    if CACHE_ENABLED:
+        cached = await _cache_get(key)
+        if cached is not None:
+            return cached
+
+    # Consulta o cache semântico (prompts com a mesma intenção)
+    embedding = None
+    if SEMANTIC_CACHE_ENABLED:
+        try:
+            loop = asyncio.get_running_loop()
+            embedding = await loop.run_in_executor(None, _semantic_encode, prompt)
+        except Exception as e:
+            logger.error("Erro no cache semântico: %s", e)
+        if embedding is not None:
+            cached = _semantic_lookup(embedding)
+            if cached is not None:
+                return cached
+
+    # Cache miss: mostra "digitando..." enquanto o OpenRouter gera a resposta
+    if chat_id is not None:
+        _spawn(send_typing(chat_id))
+
+    # Chama o OpenRouter (agrupado com outros prompts da mesma janela)
+    content = await _submit_batch(prompt)
+    if content is not None:
+        if CACHE_ENABLED:
+            await _cache_set(key, content)
+        if embedding is not None:
+            _semantic_store(embedding, content)
+        return content
+
+    return _FALLBACKS[random.randrange(len(_FALLBACKS))]
+
+async def _read_stream(response: aiohttp.ClientResponse) -> Optional[str]:
+    """Acumula o conteúdo de uma resposta SSE (stream=True) do OpenRouter"""
+    parts = []
+    finished = False
+    async for line in response.content:
+        line = line.strip()
+        # Ignora linhas vazias e comentários SSE (": OPENROUTER PROCESSING")
+        if not line.startswith(b"data:"):
+            continue
+        data = line[5:].strip()
+        if data == b"[DONE]":
+            finished = True
+            break
+
+        chunk = orjson.loads(data)
+        if "error" in chunk:
+            logger.error("OpenRouter stream error: %s", chunk["error"].get("message", "Erro desconhecido"))
+            return None
+        for choice in chunk.get("choices", ()):
+            delta = choice.get("delta", {}).get("content")
+            if delta:
+                parts.append(delta)
+            if choice.get("finish_reason"):
+                finished = True
+
+    # Stream cortado antes do fim: não serve (nem cacheia) resposta truncada
+    if not finished:
+        logger.error("OpenRouter stream encerrado sem [DONE]")
+        return None
+    return "".join(parts) or None
+
+async def call_openrouter(prompt: str) -> Optional[str]:
+    """Faz a chamada ao OpenRouter e retorna o conteúdo (None em caso de erro)"""
     # Prepara requisição
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "HTTP-Referer": "https://melissa-bot.com",
-        "X-Title": "MelissaBot",
-        "Content-Type": "application/json"
-    }
-
-    payload = {
-        "model": "anthropic/claude-3-haiku",
-        "messages": [
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": prompt}
-        ],
-        "temperature": 0.8,
-        "max_tokens": 150
-    }
+    body = _PAYLOAD_HEAD + orjson.dumps(prompt) + _PAYLOAD_TAIL
 
     # Tenta conectar ao OpenRouter
     try:
-        response = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers=headers,
-            json=payload,
-            timeout=REQUEST_TIMEOUT
-        )
+        async with aio_session.post(
+            OPENROUTER_CHAT_URL,
+            headers=OPENROUTER_HEADERS,
+            data=body,
+            timeout=OPENROUTER_TIMEOUT
+        ) as response:
+            if response.ok:
+                return await _read_stream(response)
+
+            raw = await response.read()
+            # Corpo de erro nem sempre é JSON (ex.: página HTML do proxy)
+            try:
+                error_msg = orjson.loads(raw).get("error", {}).get("message", "Erro desconhecido")
+            except (ValueError, AttributeError):
+                error_msg = raw[:200].decode(errors="replace")
+            logger.error("OpenRouter API error (%d): %s", response.status, error_msg)
         
-        if response.status_code == 200:
-            return response.json()["choices"][0]["message"]["content"]
-            
-        error_msg = response.json().get("error", {}).get("message", "Erro desconhecido")
-        logger.error(f"OpenRouter API error: {error_msg}")
-        
-    except requests.exceptions.Timeout:
+    except asyncio.TimeoutError:
         logger.error("Timeout ao acessar OpenRouter")
-    except Exception as e:
-        logger.error(f"Erro na API OpenRouter: {str(e)}")
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Erro na API OpenRouter")
     
-    return random.choice(fallback_responses)
+    return None
+
+async def _flush_batch() -> None:
+    """Espera a janela de agrupamento e dispara os prompts pendentes juntos"""
+    await asyncio.sleep(BATCH_WINDOW)
+    batch = _pending[:]
+    _pending.clear()
+
+    # Prompts idênticos na mesma janela viram uma única chamada
+    prompts = list(dict.fromkeys(prompt for prompt, _ in batch))
+    results = await asyncio.gather(
+        *(call_openrouter(prompt) for prompt in prompts),
+        return_exceptions=True
+    )
+    by_prompt = dict(zip(prompts, results))
+
+    for prompt, fut in batch:
+        if fut.done():
+            continue
+        result = by_prompt[prompt]
+        if isinstance(result, BaseException):
+            fut.set_exception(result)
+        else:
+            fut.set_result(result)
+
+async def _submit_batch(prompt: str) -> Optional[str]:
+    """Coloca o prompt na janela de agrupamento atual e aguarda a resposta"""
+    if BATCH_WINDOW <= 0:
+        return await call_openrouter(prompt)
+
+    fut = asyncio.get_running_loop().create_future()
+    _pending.append((prompt, fut))
+    if len(_pending) == 1:
+        _spawn(_flush_batch())
+    return await fut
 
 # ======================================
 # ROTAS
 # ======================================
-@app.route("/")
-def home():
+def start_command() -> str:
+    """Mensagem de boas-vindas do /start"""
+    return "Irmão(ã)! Sou o Postigo, Deus colocou você no meu caminho hoje para falarmos sobre as promessas dEle para sua vida. O que o seu coração está buscando nesse momento? 🙏"
+
+# Comandos do bot: nome -> função que gera a resposta
+_COMMANDS: Dict[str, Callable[[], str]] = {
+    "/start": start_command
+}
+
+def json_response(data: Dict[str, Any], status: int = 200) -> web.Response:
+    """Resposta JSON serializada com orjson"""
+    return web.Response(body=orjson.dumps(data), status=status, content_type="application/json")
+
+# Corpo fixo da rota raiz, serializado uma única vez
+_HOME_BODY = orjson.dumps({
+    "status": "online",
+    "service": "Postigo",
+    "version": "2.1",
+    "model": "anthropic/claude-3-haiku"
+})
+
+async def home(request: web.Request) -> web.Response:
     """Rota raiz para verificação básica"""
-    return jsonify({
-        "status": "online",
-        "service": "Postigo",
-        "version": "2.1",
-        "model": "anthropic/claude-3-haiku"
-    })
+    return web.Response(body=_HOME_BODY, content_type="application/json")
 
-@app.route("/health")
-def health_check():
+async def health_check(request: web.Request) -> web.Response:
     """Endpoint avançado de verificação de saúde"""
     checks = {
         "telegram_api": False,
         "openrouter_api": False
     }
 
-    # Teste Telegram
-    try:
-        tg_response = requests.get(
-            f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/getMe",
-            timeout=3
-        )
-        checks["telegram_api"] = tg_response.status_code == 200
-    except Exception as e:
-        logger.error(f"Health check failed (Telegram): {str(e)}")
+    async def probe(name: str, label: str, method: str, url: str) -> None:
+        try:
+            async with aio_session.request(
+                method,
+                url,
+                timeout=HEALTH_TIMEOUT
+            ) as response:
+                checks[name] = response.status == 200
+        except Exception as e:
+            logger.error("Health check failed (%s): %s", label, e)
 
-    # Teste OpenRouter
-    try:
-        or_response = requests.head(
-            "https://openrouter.ai/api/v1",
-            timeout=3
-        )
-        checks["openrouter_api"] = or_response.status_code == 200
-    except Exception as e:
-        logger.error(f"Health check failed (OpenRouter): {str(e)}")
+    # Testa Telegram e OpenRouter em paralelo
+    await asyncio.gather(
+        probe("telegram_api", "Telegram", "GET", TELEGRAM_GETME_URL),
+        probe("openrouter_api", "OpenRouter", "HEAD", OPENROUTER_HEALTH_URL)
+    )
 
     status = "healthy" if all(checks.values()) else "degraded"
     
-    return jsonify({
+    return json_response({
         "status": status,
         "checks": checks,
-        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds")
     })
 
-@app.route(f"/{TELEGRAM_TOKEN}", methods=["POST"])
-def webhook():
+async def webhook(request: web.Request) -> web.Response:
     """Endpoint principal com tratamento completo de erros"""
     try:
         # Verifica dados recebidos
-        data: Dict[str, Any] = request.get_json()
+        try:
+            data: Dict[str, Any] = await request.json(loads=orjson.loads)
+        except ValueError:
+            data = None
         if not data:
             logger.warning("Requisição vazia recebida")
-            return jsonify({"status": "error", "message": "Empty request"}), 400
+            return json_response({"status": "error", "message": "Empty request"}, status=400)
 
         # Extrai informações da mensagem
         message = data.get("message", {})
@@ -265,26 +602,97 @@ def webhook():
 
         if not chat_id:
             logger.warning("Chat ID não encontrado")
-            return jsonify({"status": "error", "message": "Invalid chat ID"}), 400
+            return json_response({"status": "error", "message": "Invalid chat ID"}, status=400)
 
-        # Processa comando /start
-        if text.startswith("/start"):
-            response_text = "Irmão(ã)! Sou o Postigo, Deus colocou você no meu caminho hoje para falarmos sobre as promessas dEle para sua vida. O que o seu coração está buscando nesse momento? 🙏"
+        # Processa comandos (/start, /start@NomeDoBot...)
+        cmd = text.split(" ", 1)[0].split("@", 1)[0] if text.startswith("/") else ""
+        handler = _COMMANDS.get(cmd)
+        if handler is not None:
+            response_text = handler()
         elif text:
-            response_text = generate_response(text)
+            # Mensagens triviais ou longas demais não vão para o OpenRouter
+            trivial = _TRIVIAL_REPLIES.get(text.lower().strip(" .!?"))
+            if trivial is not None:
+                response_text = trivial
+            elif len(text) > MAX_PROMPT_LENGTH:
+                response_text = LONG_PROMPT_REPLY
+            else:
+                response_text = await generate_response(text, chat_id)
         else:
             response_text = "Manda suas dúvidas pra eu responder... 👀"
 
-        # Envia resposta
-        if not send_telegram_message(chat_id, response_text):
-            logger.error("Falha crítica ao enviar resposta para o Telegram")
+        # Enfileira a resposta (envio síncrono se a fila estiver cheia)
+        try:
+            _send_q.put_nowait((chat_id, response_text))
+        except asyncio.QueueFull:
+            logger.warning("Fila de envio cheia, enviando direto")
+            if not await send_telegram_message(chat_id, response_text):
+                logger.error("Falha crítica ao enviar resposta para o Telegram")
 
-        return jsonify({"status": "success"})
+        return json_response({"status": "success"})
 
-    except Exception as e:
-        logger.critical(f"Erro não tratado no webhook: {str(e)}")
-        traceback.print_exc()
-        return jsonify({"status": "error", "message": "Internal server error"}), 500
+    except Exception:
+        logger.exception("Erro não tratado no webhook")
+        return json_response({"status": "error", "message": "Internal server error"}, status=500)
+
+# ======================================
+# CICLO DE VIDA
+# ======================================
+async def send_worker() -> None:
+    """Consome a fila de envios e entrega as mensagens ao Telegram"""
+    while True:
+        chat_id, text = await _send_q.get()
+        try:
+            if not await send_telegram_message(chat_id, text):
+                logger.error("Falha crítica ao enviar resposta para o Telegram")
+        except Exception:
+            logger.exception("Erro no worker de envio")
+        finally:
+            _send_q.task_done()
+
+async def on_startup(app: web.Application) -> None:
+    """Cria a sessão HTTP compartilhada e os workers de envio"""
+    global aio_session, _send_q
+    aio_session = aiohttp.ClientSession(
+        timeout=OPENROUTER_TIMEOUT,
+        connector=aiohttp.TCPConnector(limit=100, keepalive_timeout=75)
+    )
+    _send_q = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+    _send_workers.extend(
+        asyncio.create_task(send_worker()) for _ in range(SEND_WORKERS)
+    )
+
+async def on_cleanup(app: web.Application) -> None:
+    """Entrega as respostas pendentes, encerra os workers e fecha a sessão HTTP"""
+    # Roda depois que os webhooks em andamento terminaram; espera as tarefas
+    # em background (agrupamento, "digitando...") antes de esvaziar a fila
+    if _background_tasks:
+        _, pending = await asyncio.wait(set(_background_tasks), timeout=TELEGRAM_API_TIMEOUT)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    if _send_q is not None:
+        try:
+            await asyncio.wait_for(_send_q.join(), timeout=TELEGRAM_API_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("%d mensagens não enviadas no desligamento", _send_q.qsize())
+
+    for task in _send_workers:
+        task.cancel()
+    await asyncio.gather(*_send_workers, return_exceptions=True)
+    _send_workers.clear()
+    if aio_session is not None:
+        await aio_session.close()
+    if _rds is not None:
+        await _rds.aclose()
+
+app.on_startup.append(on_startup)
+app.on_cleanup.append(on_cleanup)
+
+app.router.add_get("/", home)
+app.router.add_get("/health", health_check)
+app.router.add_post(f"/{TELEGRAM_TOKEN}", webhook)
 
 # ======================================
 # INICIALIZAÇÃO
@@ -292,9 +700,9 @@ def webhook():
 if __name__ == "__main__":
     # Log de inicialização
     logger.info("\n" + "="*50)
-    logger.info(f"🔥 Postigo - Versão 2.1")
-    logger.info(f"🔧 Porta: {PORT}")
-    logger.info(f"🤖 Modelo: anthropic/claude-3-haiku")
+    logger.info("🔥 Postigo - Versão 2.1")
+    logger.info("🔧 Porta: %s", PORT)
+    logger.info("🤖 Modelo: anthropic/claude-3-haiku")
     logger.info("="*50 + "\n")
     
-    app.run(host="0.0.0.0", port=PORT, debug=False)
+    web.run_app(app, host="0.0.0.0", port=PORT)